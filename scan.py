@@ -4,16 +4,75 @@ GitAuditor GitHub Action
 Triggers security scans via GitAuditor.io API
 """
 
+import io
 import os
 import sys
-import json
 import time
-import requests
-from typing import Dict, List, Optional, Any, Tuple
+import atexit
+import asyncio
+import httpx
+import orjson
+from collections import Counter
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 from datetime import datetime, timezone
-import argparse
 from version import get_version, get_version_info
 
+# Severities reported in outputs and summaries, most severe first
+SEVERITIES = ("critical", "high", "medium", "low")
+
+# GitAuditor severity -> SARIF level, and severity rank for threshold checks
+SARIF_LEVELS = {
+    "critical": "error",
+    "high": "error",
+    "medium": "warning",
+    "low": "note"
+}
+SEVERITY_RANKS = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+
+# Markdown severity table for the job summary, filled from per-severity counts
+SEVERITY_TABLE = (
+    "| Severity | Count |\n"
+    "|----------|-------|\n"
+    "| Critical | {critical} |\n"
+    "| High | {high} |\n"
+    "| Medium | {medium} |\n"
+    "| Low | {low} |\n"
+)
+
+# Issues fetched per page (kept at the common per_page maximum so servers don't cap it),
+# and issues listed individually in the table summary
+ISSUE_PAGE_SIZE = 100
+TABLE_ISSUE_LIMIT = 10
+
+# Scan status polling: exponential backoff bounds and server-side long-poll window (seconds)
+POLL_INITIAL_DELAY = 1.0
+POLL_MAX_DELAY = 30.0
+POLL_BACKOFF_FACTOR = 1.5
+STATUS_LONG_POLL_WAIT = 30
+# Fraction of the long-poll window a status request must take to count as held open by the server
+LONG_POLL_HONOURED_RATIO = 0.9
+
+# HTTP timeouts (seconds): generous enough for scan creation and large issue pages
+HTTP_TIMEOUT = 120.0
+HTTP_CONNECT_TIMEOUT = 10.0
+
+# HTTP connection pool: keep idle connections longer than the slowest poll interval
+HTTP_MAX_CONNECTIONS = 32
+HTTP_KEEPALIVE_EXPIRY = 60.0
+HTTP_CONNECT_RETRIES = 3
+
+# GitHub Actions environment variables copied into the GitHub context
+GITHUB_CONTEXT_VARS = {
+    "GITHUB_REPOSITORY": "repository",
+    "GITHUB_EVENT_NAME": "event",
+    "GITHUB_REF": "ref",
+    "GITHUB_SHA": "sha"
+}
+
+# Upper bound on concurrent scan-creation requests when fanning out over repositories
+MAX_CONCURRENT_SCANS = max(1, min(32, (os.cpu_count() or 1) * 2))
+
 def log(message: str, level: str = "INFO"):
     """Log message with timestamp"""
     timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
@@ -24,48 +83,98 @@ def error(message: str):
     log(message, "ERROR")
     sys.exit(1)
 
+# GitHub Actions outputs and job summary are buffered and written once by flush_outputs()
+_output_buf: List[str] = []
+_summary_buf: List[str] = []
+
 def set_output(name: str, value: str):
     """Set GitHub Actions output"""
-    if "GITHUB_OUTPUT" in os.environ:
-        with open(os.environ["GITHUB_OUTPUT"], "a") as f:
-            f.write(f"{name}={value}\n")
-    print(f"::set-output name={name}::{value}")
+    _output_buf.append(f"{name}={value}\n")
 
 def set_summary(content: str):
     """Set GitHub Actions job summary"""
-    if "GITHUB_STEP_SUMMARY" in os.environ:
-        with open(os.environ["GITHUB_STEP_SUMMARY"], "a") as f:
-            f.write(content)
+    _summary_buf.append(content)
+
+def flush_outputs():
+    """Write buffered outputs and job summary to the GitHub Actions files"""
+    for env_var, buf in (("GITHUB_OUTPUT", _output_buf), ("GITHUB_STEP_SUMMARY", _summary_buf)):
+        if buf and env_var in os.environ:
+            with open(os.environ[env_var], "a") as f:
+                f.write("".join(buf))
+        buf.clear()
 
 class GitAuditorClient:
-    """Client for GitAuditor API"""
+    """Async client for GitAuditor API"""
     
     def __init__(self, api_url: str, token: str):
         self.api_url = api_url.rstrip('/')
         self.token = token
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json',
-            'User-Agent': f'GitAuditor-GitHub-Action/{get_version()}'
-        })
-    
-    def get_organization_by_name(self, org_name: str) -> Optional[Dict]:
+        self.session = httpx.AsyncClient(
+            headers={
+                'Authorization': f'Bearer {token}',
+                'Content-Type': 'application/json',
+                'User-Agent': f'GitAuditor-GitHub-Action/{get_version()}'
+            },
+            # Match requests' behaviour: follow redirects and set an explicit timeout
+            # rather than httpx's 5s default
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                ),
+                retries=HTTP_CONNECT_RETRIES
+            )
+        )
+        # Last status response per scan, keyed by scan ID, for conditional requests
+        self._status_cache: Dict[str, Tuple[str, Dict]] = {}
+        # Organizations seen so far, keyed by external_id; misses are serialized so
+        # concurrent lookups share a single /organizations download
+        self._org_cache: Dict[str, Dict] = {}
+        self._org_lock = asyncio.Lock()
+        self._org_list_loaded = False
+    
+    async def aclose(self):
+        """Close the underlying HTTP session"""
+        await self.session.aclose()
+    
+    async def get_organization_by_name(self, org_name: str) -> Optional[Dict]:
         """Get organization by GitHub org name"""
-        try:
-            response = self.session.get(f"{self.api_url}/organizations")
-            response.raise_for_status()
+        external_id = f'github_{org_name}'
+        if external_id in self._org_cache:
+            return self._org_cache[external_id]
+        
+        async with self._org_lock:
+            # Another lookup may have filled the cache while we waited; once the full
+            # list has been loaded, a miss means the organization does not exist
+            if external_id in self._org_cache or self._org_list_loaded:
+                return self._org_cache.get(external_id)
             
-            orgs = response.json()
-            for org in orgs:
-                if org.get('external_id') == f'github_{org_name}':
+            try:
+                # Prefer the single-resource lookup; list all organizations if the server rejects
+                # it (any 4xx, e.g. when /organizations/{id} is keyed by internal ID)
+                response = await self.session.get(f"{self.api_url}/organizations/{external_id}")
+                if not response.is_client_error:
+                    response.raise_for_status()
+                    org = orjson.loads(response.content)
+                    self._org_cache[external_id] = org
                     return org
-            return None
-        except Exception as e:
-            log(f"Failed to get organization: {e}", "ERROR")
-            return None
+                
+                response = await self.session.get(f"{self.api_url}/organizations")
+                response.raise_for_status()
+                
+                orgs = orjson.loads(response.content)
+                self._org_cache.update({org['external_id']: org for org in orgs if org.get('external_id')})
+                self._org_list_loaded = True
+                return self._org_cache.get(external_id)
+            except Exception as e:
+                log(f"Failed to get organization: {e}", "ERROR")
+                return None
     
-    def create_repository_scan(self, repo_id: str, check_types: List[str]) -> Dict:
+    async def create_repository_scan(self, repo_id: str, check_types: Sequence[str]) -> Dict:
         """Create a repository scan"""
         payload = {
             "repository_id": repo_id,
@@ -74,11 +183,11 @@ class GitAuditorClient:
             }
         }
         
-        response = self.session.post(f"{self.api_url}/scans/repository", json=payload)
+        response = await self.session.post(f"{self.api_url}/scans/repository", content=orjson.dumps(payload))
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     
-    def create_organization_scan(self, org_id: str, check_types: List[str], visibility_filter: List[str]) -> Dict:
+    async def create_organization_scan(self, org_id: str, check_types: Sequence[str], visibility_filter: Sequence[str]) -> Dict:
         """Create an organization scan"""
         payload = {
             "organization_id": org_id,
@@ -88,11 +197,11 @@ class GitAuditorClient:
             "visibility_filter": visibility_filter
         }
         
-        response = self.session.post(f"{self.api_url}/scans/organization", json=payload)
+        response = await self.session.post(f"{self.api_url}/scans/organization", content=orjson.dumps(payload))
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     
-    def create_enterprise_scan(self, enterprise_id: str, check_types: List[str], visibility_filter: List[str]) -> Dict:
+    async def create_enterprise_scan(self, enterprise_id: str, check_types: Sequence[str], visibility_filter: Sequence[str]) -> Dict:
         """Create an enterprise scan"""
         payload = {
             "enterprise_id": enterprise_id,
@@ -102,56 +211,179 @@ class GitAuditorClient:
             "visibility_filter": visibility_filter
         }
         
-        response = self.session.post(f"{self.api_url}/scans/enterprise", json=payload)
+        response = await self.session.post(f"{self.api_url}/scans/enterprise", content=orjson.dumps(payload))
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     
-    def get_scan_status(self, scan_id: str) -> Dict:
-        """Get scan status"""
-        response = self.session.get(f"{self.api_url}/scans/{scan_id}/status")
+    async def get_scan_status(self, scan_id: str, wait: Optional[int] = None) -> Dict:
+        """
+        Get scan status.
+        
+        Sends If-None-Match with the last seen ETag so unchanged statuses come back
+        as a cheap 304. When `wait` is set the server may hold the request open for up
+        to that many seconds until the status changes (long-poll); servers that do not
+        support it simply answer immediately.
+        """
+        headers = {}
+        cached = self._status_cache.get(scan_id)
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        
+        params = {}
+        timeout = self.session.timeout
+        if wait:
+            params['wait'] = wait
+            # The server may hold the request for `wait` seconds on top of the usual budget
+            timeout = httpx.Timeout(timeout.read + wait, connect=timeout.connect)
+        
+        response = await self.session.get(
+            f"{self.api_url}/scans/{scan_id}/status", headers=headers, params=params, timeout=timeout
+        )
+        if response.status_code == 304 and cached:
+            return cached[1]
         response.raise_for_status()
-        return response.json()
+        
+        status = orjson.loads(response.content)
+        etag = response.headers.get('ETag')
+        if etag:
+            self._status_cache[scan_id] = (etag, status)
+        return status
     
-    def get_issue_instances(self, scan_id: str) -> List[Dict]:
-        """Get issue instances for a scan"""
-        response = self.session.get(f"{self.api_url}/issues/instances", params={"scan_id": scan_id})
-        response.raise_for_status()
-        return response.json()
+    async def get_issue_summary(self, scan_id: str) -> Optional[Dict[str, int]]:
+        """
+        Get per-severity issue counts for a scan without downloading the issues.
+        
+        Returns None if the summary is unavailable for any reason, so callers can
+        fall back to counting the issues themselves.
+        """
+        try:
+            response = await self.session.get(f"{self.api_url}/scans/{scan_id}/summary")
+            # Endpoint not implemented by this server: expected, fall back quietly
+            if response.status_code in (404, 405, 501):
+                return None
+            response.raise_for_status()
+            
+            summary = orjson.loads(response.content)
+            counts = {severity: int(summary.get(severity, 0)) for severity in SEVERITIES}
+            counts["total"] = int(summary.get("total", sum(counts.values())))
+            return counts
+        except Exception as e:
+            log(f"Issue summary unavailable for scan {scan_id}: {e}", "WARNING")
+            return None
+    
+    async def iter_issue_instances(self, scan_id: str, page_size: int = ISSUE_PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        """
+        Yield issue instances for a scan one page at a time.
+        
+        Follows the server's pagination metadata (a Link header or X-Total-Count) when
+        present. Without it, paging continues only while pages come back full, and stops
+        as soon as a page repeats the previous one, which is what a server that ignores
+        the paging parameters does.
+        """
+        page = 1
+        fetched = 0
+        previous_first = None
+        while True:
+            response = await self.session.get(
+                f"{self.api_url}/issues/instances",
+                params={"scan_id": scan_id, "page": page, "per_page": page_size}
+            )
+            response.raise_for_status()
+            
+            issues = orjson.loads(response.content)
+            if not issues or issues[0] == previous_first:
+                return
+            yield issues
+            fetched += len(issues)
+            previous_first = issues[0]
+            
+            total = response.headers.get("X-Total-Count", "")
+            if response.links:
+                if "next" not in response.links:
+                    return
+            elif total.isdigit():
+                if fetched >= int(total):
+                    return
+            elif len(issues) != page_size:
+                # A short page is the last one; an oversized page means pagination was ignored
+                return
+            page += 1
 
-def get_github_context() -> Dict:
-    """Get GitHub context information"""
-    github_context = {}
+def split_csv(value: str) -> Tuple[str, ...]:
+    """Split a comma-separated input into its non-empty, stripped items"""
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Action configuration, read once from the environment"""
+    api_url: str
+    token: Optional[str]
+    scan_type: str
+    repositories: Tuple[str, ...]
+    organization_id: Optional[str]
+    enterprise_id: Optional[str]
+    check_types: Tuple[str, ...]
+    visibility_filter: Tuple[str, ...]
+    fail_on_issues: bool
+    severity_threshold: str
+    output_format: str
+    wait_for_completion: bool
+    timeout: int
     
-    # Repository information
-    if "GITHUB_REPOSITORY" in os.environ:
-        repo_full_name = os.environ["GITHUB_REPOSITORY"]
-        github_context["repository"] = repo_full_name
-        github_context["owner"], github_context["repo_name"] = repo_full_name.split("/", 1)
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "Config":
+        """Build the configuration from action inputs passed as environment variables"""
+        get = env.get
+        return cls(
+            api_url=get("API_URL", "https://api.gitauditor.io"),
+            token=get("GITAUDITOR_TOKEN"),
+            scan_type=get("SCAN_TYPE", "repository"),
+            repositories=split_csv(get("REPOSITORIES", "")),
+            organization_id=get("ORGANIZATION_ID"),
+            enterprise_id=get("ENTERPRISE_ID"),
+            check_types=split_csv(get("CHECK_TYPES", "branch_protection,admin_rights,dependabot,secrets,secret_scanning")),
+            visibility_filter=split_csv(get("VISIBILITY_FILTER", "public,internal,private")),
+            fail_on_issues=get("FAIL_ON_ISSUES", "false").lower() == "true",
+            severity_threshold=get("SEVERITY_THRESHOLD", "medium"),
+            output_format=get("OUTPUT_FORMAT", "table"),
+            wait_for_completion=get("WAIT_FOR_COMPLETION", "true").lower() == "true",
+            timeout=int(get("TIMEOUT", "30"))
+        )
     
-    # Event information
-    if "GITHUB_EVENT_NAME" in os.environ:
-        github_context["event"] = os.environ["GITHUB_EVENT_NAME"]
+    @property
+    def needs_issue_details(self) -> bool:
+        """Only these formats need every issue; the rest can use server-side counts"""
+        return self.output_format == "json" or "sarif" in self.output_format
     
-    # Reference information
-    if "GITHUB_REF" in os.environ:
-        github_context["ref"] = os.environ["GITHUB_REF"]
+    @property
+    def keep_all_issues(self) -> bool:
+        """Only JSON output needs every issue held in memory; the rest is built page by page"""
+        return self.output_format == "json"
+
+def get_github_context(env: Mapping[str, str] = os.environ) -> Dict:
+    """Get GitHub context information"""
+    github_context = {out: env[src] for src, out in GITHUB_CONTEXT_VARS.items() if src in env}
     
-    # SHA information
-    if "GITHUB_SHA" in os.environ:
-        github_context["sha"] = os.environ["GITHUB_SHA"]
+    # Repository information
+    if "repository" in github_context:
+        github_context["owner"], github_context["repo_name"] = github_context["repository"].split("/", 1)
     
     return github_context
 
-def wait_for_scan_completion(client: GitAuditorClient, scan_id: str, timeout_minutes: int = 30) -> Dict:
+async def wait_for_scan_completion(client: GitAuditorClient, scan_id: str, timeout_minutes: int = 30) -> Dict:
     """Wait for scan to complete"""
     timeout_seconds = timeout_minutes * 60
     start_time = time.time()
     
     log(f"Waiting for scan {scan_id} to complete (timeout: {timeout_minutes}m)")
     
+    delay = POLL_INITIAL_DELAY
     while time.time() - start_time < timeout_seconds:
+        remaining = timeout_seconds - (time.time() - start_time)
+        wait = max(1, min(STATUS_LONG_POLL_WAIT, int(remaining)))
+        request_start = time.time()
         try:
-            status = client.get_scan_status(scan_id)
+            status = await client.get_scan_status(scan_id, wait=wait)
             scan_status = status.get("status", "unknown")
             
             log(f"Scan status: {scan_status}")
@@ -159,199 +391,276 @@ def wait_for_scan_completion(client: GitAuditorClient, scan_id: str, timeout_min
             if scan_status in ["completed", "failed", "cancelled"]:
                 return status
             
-            # Wait before next check
-            time.sleep(10)
+            # If the server held this request open for (nearly) the full long-poll window,
+            # it already did the waiting, so ask again straight away. Decided per request,
+            # and only for a full window, so a single slow reply or a short wait near the
+            # deadline can't turn the loop into a tight request loop.
+            held_open = time.time() - request_start >= wait * LONG_POLL_HONOURED_RATIO
+            if wait >= STATUS_LONG_POLL_WAIT and held_open:
+                delay = POLL_INITIAL_DELAY
+                continue
             
         except Exception as e:
             log(f"Error checking scan status: {e}", "WARNING")
-            time.sleep(5)
+        
+        # Back off exponentially before the next check
+        await asyncio.sleep(min(delay, max(0, timeout_seconds - (time.time() - start_time))))
+        delay = min(POLL_MAX_DELAY, delay * POLL_BACKOFF_FACTOR)
     
     raise TimeoutError(f"Scan {scan_id} did not complete within {timeout_minutes} minutes")
 
-def format_scan_results(scan_status: Dict, issues: List[Dict], output_format: str) -> str:
+async def wait_for_scans_completion(client: GitAuditorClient, scan_ids: List[str], timeout_minutes: int = 30) -> List[Dict]:
+    """Wait for several scans concurrently; if any wait fails, the rest are cancelled"""
+    tasks = [asyncio.create_task(wait_for_scan_completion(client, scan_id, timeout_minutes)) for scan_id in scan_ids]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # Stop the remaining waits so they don't keep polling (or outlive the client)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+async def create_repository_scans(client: GitAuditorClient, repo_ids: List[str], check_types: Sequence[str]) -> List[Dict]:
+    """Create repository scans concurrently, bounded by MAX_CONCURRENT_SCANS"""
+    sem = asyncio.Semaphore(MAX_CONCURRENT_SCANS)
+    
+    async def _scan_one(repo_id: str) -> Tuple[str, Dict]:
+        async with sem:
+            return repo_id, await client.create_repository_scan(repo_id, check_types)
+    
+    scan_results = {}
+    for done, pending in enumerate(asyncio.as_completed([_scan_one(r) for r in repo_ids]), 1):
+        repo_id, scan_result = await pending
+        log(f"[{done}/{len(repo_ids)}] Scan {scan_result['scan_id']} created for {repo_id}")
+        scan_results[repo_id] = scan_result
+    
+    # Preserve input order regardless of completion order
+    return [scan_results[r] for r in repo_ids]
+
+def merge_scan_statuses(statuses: List[Dict]) -> Dict:
+    """Combine the statuses of several scans into a single status"""
+    if len(statuses) == 1:
+        return statuses[0]
+    
+    states = {s.get("status", "unknown") for s in statuses}
+    return {
+        "scan_id": ", ".join(str(s.get("scan_id", "Unknown")) for s in statuses),
+        "status": states.pop() if len(states) == 1 else "mixed",
+        "scope": statuses[0].get("scope", "repository"),
+        "scans": statuses
+    }
+
+async def collect_issues(client: GitAuditorClient, scan_ids: List[str], keep_all: bool,
+                         sarif_report: Optional["SarifReport"] = None) -> Tuple[List[Dict], Dict[str, int], int]:
+    """
+    Stream issues for the given scans page by page.
+    
+    Each page is counted and added to the SARIF report as it arrives. Only the first
+    TABLE_ISSUE_LIMIT issues are kept unless keep_all is set, so peak memory stays
+    around one page.
+    
+    Returns:
+        Tuple of kept issues, per-severity counts and total issue count
+    """
+    kept = []
+    counts = Counter()
+    total = 0
+    # Scans are read one after another so issues keep a stable order
+    for scan_id in scan_ids:
+        async for page in client.iter_issue_instances(scan_id):
+            counts.update(issue.get("severity", "unknown").lower() for issue in page)
+            total += len(page)
+            if sarif_report is not None:
+                sarif_report.add_issues(page)
+            if keep_all:
+                kept.extend(page)
+            elif len(kept) < TABLE_ISSUE_LIMIT:
+                kept.extend(page[:TABLE_ISSUE_LIMIT - len(kept)])
+    
+    return kept, {severity: counts[severity] for severity in SEVERITIES}, total
+
+async def preview_issues(client: GitAuditorClient, scan_ids: List[str]) -> List[Dict]:
+    """Fetch just the first TABLE_ISSUE_LIMIT issues across the given scans"""
+    preview = []
+    for scan_id in scan_ids:
+        async for page in client.iter_issue_instances(scan_id, page_size=TABLE_ISSUE_LIMIT):
+            preview.extend(page[:TABLE_ISSUE_LIMIT - len(preview)])
+            break
+        if len(preview) >= TABLE_ISSUE_LIMIT:
+            break
+    return preview
+
+def count_issues_by_severity(issues: List[Dict]) -> Dict[str, int]:
+    """Count issues per severity in a single pass"""
+    counts = Counter(issue.get("severity", "unknown").lower() for issue in issues)
+    return {severity: counts[severity] for severity in SEVERITIES}
+
+def format_scan_results(scan_status: Dict, issues: List[Dict], output_format: str,
+                        severity_counts: Optional[Dict[str, int]] = None,
+                        issue_count: Optional[int] = None) -> str:
     """Format scan results for output"""
+    if severity_counts is None:
+        severity_counts = count_issues_by_severity(issues)
+    if issue_count is None:
+        issue_count = len(issues)
+    
     if output_format == "json":
-        return json.dumps({
+        return orjson.dumps({
             "scan": scan_status,
             "issues": issues
-        }, indent=2)
+        }, option=orjson.OPT_INDENT_2).decode()
     
     elif output_format == "table":
         # Create a formatted table
-        result = []
-        result.append("# GitAuditor Scan Results")
-        result.append("")
-        result.append(f"**Scan ID:** {scan_status.get('scan_id', 'Unknown')}")
-        result.append(f"**Status:** {scan_status.get('status', 'Unknown')}")
-        result.append(f"**Scope:** {scan_status.get('scope', 'Unknown')}")
-        result.append("")
+        buf = io.StringIO()
+        w = buf.write
+        w("# GitAuditor Scan Results\n\n")
+        w(f"**Scan ID:** {scan_status.get('scan_id', 'Unknown')}\n")
+        w(f"**Status:** {scan_status.get('status', 'Unknown')}\n")
+        w(f"**Scope:** {scan_status.get('scope', 'Unknown')}\n\n")
         
         if issues:
-            # Group issues by severity
-            severity_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0}
-            for issue in issues:
-                severity = issue.get("severity", "unknown").lower()
-                if severity in severity_counts:
-                    severity_counts[severity] += 1
+            w("## Issue Summary\n\n")
+            w(SEVERITY_TABLE.format(**severity_counts))
+            w("\n")
             
-            result.append("## Issue Summary")
-            result.append("")
-            result.append("| Severity | Count |")
-            result.append("|----------|-------|")
-            for severity, count in severity_counts.items():
-                result.append(f"| {severity.capitalize()} | {count} |")
-            result.append("")
+            w("## Issues Found\n\n")
+            for issue in issues[:TABLE_ISSUE_LIMIT]:
+                w(f"- **{issue.get('issue_id', 'Unknown')}** ({issue.get('severity', 'unknown')})\n")
+                description = (issue.get('context') or {}).get('description')
+                if description:
+                    w(f"  {description}\n")
             
-            if len(issues) > 0:
-                result.append("## Issues Found")
-                result.append("")
-                for issue in issues[:10]:  # Limit to first 10 issues
-                    result.append(f"- **{issue.get('issue_id', 'Unknown')}** ({issue.get('severity', 'unknown')})")
-                    if issue.get('context', {}).get('description'):
-                        result.append(f"  {issue['context']['description']}")
-                
-                if len(issues) > 10:
-                    result.append(f"... and {len(issues) - 10} more issues")
+            if issue_count > TABLE_ISSUE_LIMIT:
+                w(f"... and {issue_count - TABLE_ISSUE_LIMIT} more issues\n")
         else:
-            result.append("✅ No security issues found!")
+            w("✅ No security issues found!\n")
         
-        return "\n".join(result)
+        return buf.getvalue()
     
-    return f"Scan completed with {len(issues)} issues found"
+    return f"Scan completed with {issue_count} issues found"
 
-def generate_sarif_output(issues: List[Dict], scan_info: Dict) -> Dict:
-    """Generate SARIF format output"""
-    sarif = {
-        "$schema": "https://raw.githubusercontent.com/oasis-tcs/sarif-spec/master/Schemata/sarif-schema-2.1.0.json",
-        "version": "2.1.0",
-        "runs": [
-            {
-                "tool": {
-                    "driver": {
-                        "name": "GitAuditor",
-                        "version": "1.0.0",
-                        "informationUri": "https://gitauditor.io",
-                        "rules": []
+class SarifReport:
+    """SARIF report built incrementally, so issues can be added page by page"""
+    
+    def __init__(self):
+        # Rules deduped by ID, results in issue order
+        self.rules_by_id: Dict[str, Dict] = {}
+        self.results: List[Dict] = []
+    
+    def add_issues(self, issues: Iterable[Dict]):
+        """Add rules and results for a batch of issues"""
+        for issue in issues:
+            ctx = issue.get("context") or {}
+            issue_id = issue.get("issue_id", "unknown")
+            level = SARIF_LEVELS.get(issue.get("severity", "medium").lower(), "warning")
+            
+            if issue_id not in self.rules_by_id:
+                self.rules_by_id[issue_id] = {
+                    "id": issue_id,
+                    "shortDescription": {
+                        "text": issue.get("title", issue_id)
+                    },
+                    "fullDescription": {
+                        "text": issue.get("description", "")
+                    },
+                    "help": {
+                        "text": issue.get("remediation", "")
+                    },
+                    "defaultConfiguration": {
+                        "level": level
                     }
+                }
+            
+            self.results.append({
+                "ruleId": issue_id,
+                "message": {
+                    "text": ctx.get("description", f"Issue detected: {issue_id}")
                 },
-                "results": []
-            }
-        ]
-    }
+                "level": level,
+                "locations": [
+                    {
+                        "physicalLocation": {
+                            "artifactLocation": {
+                                "uri": ctx.get("file_path", ".")
+                            }
+                        }
+                    }
+                ]
+            })
     
-    # Add rules and results
-    rules_added = set()
-    for issue in issues:
-        issue_id = issue.get("issue_id", "unknown")
-        
-        # Add rule if not already added
-        if issue_id not in rules_added:
-            rule = {
-                "id": issue_id,
-                "shortDescription": {
-                    "text": issue.get("title", issue_id)
-                },
-                "fullDescription": {
-                    "text": issue.get("description", "")
-                },
-                "help": {
-                    "text": issue.get("remediation", "")
-                },
-                "defaultConfiguration": {
-                    "level": map_severity_to_sarif_level(issue.get("severity", "medium"))
-                }
-            }
-            sarif["runs"][0]["tool"]["driver"]["rules"].append(rule)
-            rules_added.add(issue_id)
-        
-        # Add result
-        result = {
-            "ruleId": issue_id,
-            "message": {
-                "text": issue.get("context", {}).get("description", f"Issue detected: {issue_id}")
-            },
-            "level": map_severity_to_sarif_level(issue.get("severity", "medium")),
-            "locations": [
+    def to_dict(self) -> Dict:
+        """Return the SARIF document"""
+        return {
+            "$schema": "https://raw.githubusercontent.com/oasis-tcs/sarif-spec/master/Schemata/sarif-schema-2.1.0.json",
+            "version": "2.1.0",
+            "runs": [
                 {
-                    "physicalLocation": {
-                        "artifactLocation": {
-                            "uri": issue.get("context", {}).get("file_path", ".")
+                    "tool": {
+                        "driver": {
+                            "name": "GitAuditor",
+                            "version": "1.0.0",
+                            "informationUri": "https://gitauditor.io",
+                            "rules": list(self.rules_by_id.values())
                         }
-                    }
+                    },
+                    "results": self.results
                 }
             ]
         }
-        sarif["runs"][0]["results"].append(result)
-    
-    return sarif
 
-def map_severity_to_sarif_level(severity: str) -> str:
-    """Map GitAuditor severity to SARIF level"""
-    mapping = {
-        "critical": "error",
-        "high": "error", 
-        "medium": "warning",
-        "low": "note"
-    }
-    return mapping.get(severity.lower(), "warning")
-
-def main():
+async def main():
     """Main function"""
+    # Make sure outputs are written even when error() exits early
+    atexit.register(flush_outputs)
+    
     version_info = get_version_info()
     log(f"Starting GitAuditor scan (Action v{version_info['version']})")
     
     # Get configuration from environment
-    api_url = os.environ.get("API_URL", "https://api.gitauditor.io")
-    token = os.environ.get("GITAUDITOR_TOKEN")
-    scan_type = os.environ.get("SCAN_TYPE", "repository")
-    organization_id = os.environ.get("ORGANIZATION_ID")
-    enterprise_id = os.environ.get("ENTERPRISE_ID")
-    check_types_str = os.environ.get("CHECK_TYPES", "branch_protection,admin_rights,dependabot,secrets,secret_scanning")
-    visibility_filter_str = os.environ.get("VISIBILITY_FILTER", "public,internal,private")
-    fail_on_issues = os.environ.get("FAIL_ON_ISSUES", "false").lower() == "true"
-    severity_threshold = os.environ.get("SEVERITY_THRESHOLD", "medium")
-    output_format = os.environ.get("OUTPUT_FORMAT", "table")
-    wait_for_completion = os.environ.get("WAIT_FOR_COMPLETION", "true").lower() == "true"
-    timeout = int(os.environ.get("TIMEOUT", "30"))
-    
-    if not token:
-        error("GITAUDITOR_TOKEN environment variable is required")
+    env = os.environ
+    config = Config.from_env(env)
     
-    # Parse lists
-    check_types = [ct.strip() for ct in check_types_str.split(",") if ct.strip()]
-    visibility_filter = [vf.strip() for vf in visibility_filter_str.split(",") if vf.strip()]
+    if not config.token:
+        error("GITAUDITOR_TOKEN environment variable is required")
     
     # Get GitHub context
-    github_context = get_github_context()
+    github_context = get_github_context(env)
     log(f"GitHub context: {github_context}")
     
     # Initialize client
-    client = GitAuditorClient(api_url, token)
+    client = GitAuditorClient(config.api_url, config.token)
     
     try:
         # Create scan based on type
-        if scan_type == "repository":
-            if not github_context.get("repository"):
-                error("Repository context not available")
+        if config.scan_type == "repository":
+            repositories = config.repositories
+            if not repositories:
+                if not github_context.get("repository"):
+                    error("Repository context not available")
+                repositories = (github_context["repository"],)
             
             # For repository scans, we need to get the organization and repository info
-            owner = github_context["owner"]
-            org = client.get_organization_by_name(owner)
-            if not org:
-                error(f"Organization '{owner}' not found in GitAuditor")
+            owners = sorted({r.split("/", 1)[0] for r in repositories})
+            orgs = await asyncio.gather(*[client.get_organization_by_name(o) for o in owners])
+            for owner, org in zip(owners, orgs):
+                if not org:
+                    error(f"Organization '{owner}' not found in GitAuditor")
             
             # For now, use a placeholder repository ID
             # In a real implementation, you'd need to get the repository ID from GitAuditor
-            repo_id = f"github_{github_context['repository'].replace('/', '_')}"
+            repo_ids = [f"github_{r.replace('/', '_')}" for r in repositories]
             
-            log(f"Creating repository scan for {github_context['repository']}")
-            scan_result = client.create_repository_scan(repo_id, check_types)
+            log(f"Creating repository scan for {', '.join(repositories)}")
+            scan_results = await create_repository_scans(client, repo_ids, config.check_types)
             
-        elif scan_type == "organization":
+        elif config.scan_type == "organization":
+            organization_id = config.organization_id
             if not organization_id:
                 # Try to get organization from GitHub context
                 if github_context.get("owner"):
-                    org = client.get_organization_by_name(github_context["owner"])
+                    org = await client.get_organization_by_name(github_context["owner"])
                     if org:
                         organization_id = org["id"]
                     else:
@@ -360,96 +669,112 @@ def main():
                     error("organization_id is required for organization scans")
             
             log(f"Creating organization scan for {organization_id}")
-            scan_result = client.create_organization_scan(organization_id, check_types, visibility_filter)
+            scan_results = [await client.create_organization_scan(organization_id, config.check_types, config.visibility_filter)]
             
-        elif scan_type == "enterprise":
-            if not enterprise_id:
+        elif config.scan_type == "enterprise":
+            if not config.enterprise_id:
                 error("enterprise_id is required for enterprise scans")
             
-            log(f"Creating enterprise scan for {enterprise_id}")
-            scan_result = client.create_enterprise_scan(enterprise_id, check_types, visibility_filter)
+            log(f"Creating enterprise scan for {config.enterprise_id}")
+            scan_results = [await client.create_enterprise_scan(config.enterprise_id, config.check_types, config.visibility_filter)]
             
         else:
-            error(f"Invalid scan_type: {scan_type}")
+            error(f"Invalid scan_type: {config.scan_type}")
         
-        scan_id = scan_result["scan_id"]
-        log(f"Scan created with ID: {scan_id}")
+        scan_ids = [str(r["scan_id"]) for r in scan_results]
+        log(f"Scan created with ID: {', '.join(scan_ids)}")
         
         # Set initial outputs
-        set_output("scan_id", str(scan_id))
+        set_output("scan_id", ",".join(scan_ids))
         set_output("status", "queued")
         
         # Wait for completion if requested
         final_status = None
         issues = []
+        severity_counts = count_issues_by_severity(issues)
+        issue_count = 0
+        sarif_report = SarifReport() if "sarif" in config.output_format else None
         
-        if wait_for_completion:
+        if config.wait_for_completion:
             try:
-                final_status = wait_for_scan_completion(client, str(scan_id), timeout)
+                statuses = await wait_for_scans_completion(client, scan_ids, config.timeout)
+                final_status = merge_scan_statuses(statuses)
                 log(f"Scan completed with status: {final_status.get('status')}")
                 
-                # Get issues
-                issues = client.get_issue_instances(str(scan_id))
-                log(f"Found {len(issues)} issues")
+                # Prefer server-side counts when the individual issues are not needed
+                summaries = []
+                if not config.needs_issue_details:
+                    summaries = await asyncio.gather(*[client.get_issue_summary(scan_id) for scan_id in scan_ids])
+                
+                if summaries and all(summary is not None for summary in summaries):
+                    severity_counts = {s: sum(summary[s] for summary in summaries) for s in SEVERITIES}
+                    issue_count = sum(summary["total"] for summary in summaries)
+                    # The table lists only the first few issues
+                    if config.output_format == "table" and issue_count:
+                        issues = await preview_issues(client, scan_ids)
+                else:
+                    issues, severity_counts, issue_count = await collect_issues(
+                        client, scan_ids, config.keep_all_issues, sarif_report
+                    )
+                log(f"Found {issue_count} issues")
                 
             except TimeoutError as e:
                 log(str(e), "WARNING")
-                final_status = client.get_scan_status(str(scan_id))
+                statuses = await asyncio.gather(*[client.get_scan_status(scan_id) for scan_id in scan_ids])
+                final_status = merge_scan_statuses(statuses)
         else:
             log("Not waiting for scan completion")
-            final_status = {"status": "queued", "scan_id": scan_id}
-        
-        # Count issues by severity
-        severity_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0}
-        for issue in issues:
-            severity = issue.get("severity", "unknown").lower()
-            if severity in severity_counts:
-                severity_counts[severity] += 1
+            final_status = merge_scan_statuses([{"status": "queued", "scan_id": scan_id} for scan_id in scan_ids])
         
         # Set outputs
         set_output("status", final_status.get("status", "unknown"))
-        set_output("issues_found", str(len(issues)))
+        set_output("issues_found", str(issue_count))
         set_output("critical_issues", str(severity_counts["critical"]))
         set_output("high_issues", str(severity_counts["high"]))
         set_output("medium_issues", str(severity_counts["medium"]))
         set_output("low_issues", str(severity_counts["low"]))
-        set_output("scan_url", f"{api_url.replace('api.', 'app.')}/scans/{scan_id}")
+        app_url = config.api_url.replace('api.', 'app.')
+        set_output("scan_url", ",".join(f"{app_url}/scans/{scan_id}" for scan_id in scan_ids))
         
         # Generate output
-        formatted_results = format_scan_results(final_status, issues, output_format)
+        formatted_results = format_scan_results(final_status, issues, config.output_format, severity_counts, issue_count)
         
         # Set job summary
         set_summary(formatted_results)
         
         # Generate SARIF if requested
-        if "sarif" in output_format:
-            sarif_data = generate_sarif_output(issues, final_status)
+        if sarif_report is not None:
+            sarif_data = sarif_report.to_dict()
             sarif_file = "gitauditor-results.sarif"
-            with open(sarif_file, "w") as f:
-                json.dump(sarif_data, f, indent=2)
+            with open(sarif_file, "wb") as f:
+                f.write(orjson.dumps(sarif_data, option=orjson.OPT_INDENT_2))
             set_output("sarif_file", sarif_file)
             log(f"SARIF file generated: {sarif_file}")
         
         # Check if we should fail
-        if fail_on_issues and len(issues) > 0:
-            # Check severity threshold
-            severity_levels = {"low": 1, "medium": 2, "high": 3, "critical": 4}
-            threshold_level = severity_levels.get(severity_threshold.lower(), 2)
-            
-            significant_issues = [
-                issue for issue in issues 
-                if severity_levels.get(issue.get("severity", "medium").lower(), 2) >= threshold_level
-            ]
+        if config.fail_on_issues and issue_count > 0:
+            # Check severity threshold against the counts; issues without a known
+            # severity rank as medium
+            threshold_level = SEVERITY_RANKS.get(config.severity_threshold.lower(), 2)
+            significant_count = sum(
+                severity_counts[severity] for severity in SEVERITIES
+                if SEVERITY_RANKS[severity] >= threshold_level
+            )
+            if SEVERITY_RANKS["medium"] >= threshold_level:
+                significant_count += issue_count - sum(severity_counts.values())
             
-            if significant_issues:
-                error(f"Scan found {len(significant_issues)} issues at or above {severity_threshold} severity")
+            if significant_count:
+                error(f"Scan found {significant_count} issues at or above {config.severity_threshold} severity")
         
         log("GitAuditor scan completed successfully")
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         error(f"API request failed: {e}")
     except Exception as e:
         error(f"Scan failed: {e}")
+    finally:
+        await client.aclose()
+        flush_outputs()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
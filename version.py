@@ -2,9 +2,107 @@
 Version utilities for GitAuditor GitHub Action
 """
 import os
+import re
+import subprocess
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 
+def _read_packed_refs(git_dir: Path) -> Dict[str, str]:
+    """
+    Parse .git/packed-refs into a ref -> commit SHA mapping.
+
+    Annotated tags are mapped to the commit they point at (the peeled "^" line).
+    """
+    refs = {}
+    packed = git_dir / "packed-refs"
+    if not packed.is_file():
+        return refs
+
+    last_ref = None
+    for line in packed.read_text().splitlines():
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("^"):
+            if last_ref:
+                refs[last_ref] = line[1:].strip()
+            continue
+        sha, _, last_ref = line.partition(" ")
+        refs[last_ref] = sha
+    return refs
+
+
+def _tag_specificity(tag: str) -> Tuple[int, Tuple[int, ...]]:
+    """
+    Sort key preferring the most specific version tag.
+
+    Ranks v1.1.2 above the floating major tag v1, and any version above a
+    non-version tag.
+    """
+    numbers = []
+    for part in tag.lstrip("v").split("."):
+        match = re.match(r"\d+", part)
+        if not match:
+            break
+        numbers.append(int(match.group()))
+    return len(numbers), tuple(numbers)
+
+
+@lru_cache(maxsize=1)
+def _read_git_state() -> Optional[dict]:
+    """
+    Read HEAD commit, branch and tags straight from the .git directory.
+
+    Avoids spawning git. Returns None when there is no plain .git directory
+    (e.g. tarball or Docker install, worktrees), so callers can fall back to git.
+
+    Returns:
+        dict: ``commit``, ``branch`` and ``tags`` pointing at HEAD, or None
+    """
+    git_dir = Path(__file__).parent / ".git"
+    if not git_dir.is_dir():
+        return None
+
+    try:
+        packed = _read_packed_refs(git_dir)
+
+        def resolve(ref: str) -> Optional[str]:
+            ref_file = git_dir / ref
+            if ref_file.is_file():
+                return ref_file.read_text().strip()
+            return packed.get(ref)
+
+        head = (git_dir / "HEAD").read_text().strip()
+        if head.startswith("ref: "):
+            ref = head[len("ref: "):]
+            commit = resolve(ref)
+            branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+        else:
+            commit, branch = head, "HEAD"
+        if not commit:
+            return None
+
+        # Loose annotated tags point at tag objects, not commits, so only
+        # lightweight loose tags and peeled packed tags can match here;
+        # get_version() falls back to git describe for the rest
+        tags = {
+            ref[len("refs/tags/"):]
+            for ref, sha in packed.items()
+            if ref.startswith("refs/tags/") and sha == commit
+        }
+        tags_dir = git_dir / "refs" / "tags"
+        if tags_dir.is_dir():
+            for tag_file in tags_dir.rglob("*"):
+                if tag_file.is_file() and tag_file.read_text().strip() == commit:
+                    tags.add(tag_file.relative_to(tags_dir).as_posix())
+
+        return {"commit": commit, "branch": branch, "tags": sorted(tags)}
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=1)
 def get_version() -> str:
     """
     Get the current version of GitAuditor Action.
@@ -32,9 +130,12 @@ def get_version() -> str:
         return env_version.strip()
 
     # Try git tag (if available)
-    try:
-        import subprocess
+    git_state = _read_git_state()
+    if git_state is not None and git_state["tags"]:
+        return max(git_state["tags"], key=_tag_specificity).lstrip("v")
 
+    # No tag found in .git (e.g. a loose annotated tag) or no .git at all
+    try:
         result = subprocess.run(
             ["git", "describe", "--tags", "--exact-match", "HEAD"],
             capture_output=True,
@@ -57,6 +158,13 @@ def get_version_info() -> dict:
     Returns:
         dict: Version information including version, git commit, etc.
     """
+    # Copy so callers can't mutate the cached value
+    return dict(_get_version_info())
+
+
+@lru_cache(maxsize=1)
+def _get_version_info() -> dict:
+    """Build version information once; see get_version_info()."""
     version = get_version()
 
     info = {
@@ -65,35 +173,31 @@ def get_version_info() -> dict:
         "description": "GitHub Action for automated git posture scanning via GitAuditor.io",
     }
 
-    # Try to get git commit info
-    try:
-        import subprocess
-
-        result = subprocess.run(
-            ["git", "rev-parse", "HEAD"],
-            capture_output=True,
-            text=True,
-            cwd=Path(__file__).parent,
-        )
-        if result.returncode == 0:
-            info["git_commit"] = result.stdout.strip()[:8]
-    except Exception:
-        pass
-
-    # Try to get git branch
-    try:
-        import subprocess
-
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            capture_output=True,
-            text=True,
-            cwd=Path(__file__).parent,
-        )
-        if result.returncode == 0:
-            info["git_branch"] = result.stdout.strip()
-    except Exception:
-        pass
+    # Try to get git commit and branch info
+    git_state = _read_git_state()
+    if git_state is not None:
+        info["git_commit"] = git_state["commit"][:8]
+        info["git_branch"] = git_state["branch"]
+    else:
+        try:
+            result = subprocess.run(
+                ["git", "log", "-1", "--format=%H%n%D"],
+                capture_output=True,
+                text=True,
+                cwd=Path(__file__).parent,
+            )
+            if result.returncode == 0:
+                lines = result.stdout.splitlines()
+                if lines:
+                    info["git_commit"] = lines[0].strip()[:8]
+                # %D lists refs like "HEAD -> main, tag: v1.0.0, origin/main"
+                refs = lines[1].split(", ") if len(lines) > 1 else []
+                info["git_branch"] = next(
+                    (ref[len("HEAD -> "):] for ref in refs if ref.startswith("HEAD -> ")),
+                    "HEAD",
+                )
+        except Exception:
+            pass
 
     # Add Docker image version info
     info["docker_image"] = f"gitauditor/gitauditor-act:{version}"